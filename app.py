@@ -1,48 +1,86 @@
 import streamlit as st
-from PIL import Image
-import fitz
 import json
-import ssl
-import numpy as np
+import math
+import time
+import pandas as pd
+from urllib.error import HTTPError
+from urllib.parse import urlparse
 
-ssl._create_default_https_context = ssl._create_unverified_context
-
-import easyocr
 from template_manager import TemplateManager
-from ocr_processor import OCRProcessor
 from verifier import Verifier
 from exporter import Exporter
+from client import ExtractionClient, ServiceBusy
+
+# OCR runs in the extraction service (service.py); this page is a client.
+
+LOCAL_HOSTS = ("127.0.0.1", "localhost")
+
+@st.cache_resource
+def get_client():
+    """Use a running service, or start one inside this Streamlit server.
+    
+    Only a local DOCUMENT_AI_URL is auto-started; an unreachable remote
+    service raises so the page can show the connection error.
+    """
+    client = ExtractionClient()
+    try:
+        client.health()
+    except OSError:
+        url = urlparse(client.base_url)
+        if url.hostname not in LOCAL_HOSTS:
+            raise
+        from service import serve, DEFAULT_PORT
+        serve(port=url.port or DEFAULT_PORT)
+    return client
 
 @st.cache_resource
-def load_ocr():
-    return easyocr.Reader(['en', 'ne'], gpu=False)
+def load_templates():
+    return TemplateManager()
+
+def add_result(doc_name, extracted):
+    """Record a finished document in both the per-doc and columnar stores"""
+    replaced = doc_name in st.session_state.extractions
+    st.session_state.extractions[doc_name] = extracted
+    if replaced:
+        columns = Exporter.empty_columns()
+        for name, data in st.session_state.extractions.items():
+            Exporter.append_columns(columns, name, data)
+        st.session_state.results = columns
+    else:
+        Exporter.append_columns(st.session_state.results, doc_name, extracted)
+    st.session_state.results_df = None
 
-def pdf_to_images(pdf_bytes):
-    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    images = []
-    for page in doc:
-        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        images.append(img)
-    doc.close()
-    return images
+def results_frame():
+    """DataFrame over the columnar results, rebuilt only after new results"""
+    if st.session_state.results_df is None:
+        st.session_state.results_df = pd.DataFrame(st.session_state.results)
+    return st.session_state.results_df
 
-def ocr_image(reader, image):
-    results = reader.readtext(np.array(image))
-    return [{"text": t, "confidence": c, "bbox": b} for b, t, c in results]
+def format_eta(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    return f"{seconds // 60:.0f}m {seconds % 60:.0f}s"
 
 st.set_page_config(page_title="Document AI", page_icon="📄", layout="wide")
 
 if "extractions" not in st.session_state:
     st.session_state.extractions = {}
+    st.session_state.results = Exporter.empty_columns()
+    st.session_state.results_df = None
 
-tm = TemplateManager()
+try:
+    client = get_client()
+except OSError as e:
+    st.error(f"Cannot reach extraction service at {ExtractionClient().base_url}: {e}")
+    st.stop()
+tm = load_templates()
+tm.refresh()
 
 with st.sidebar:
     st.header("Document AI")
     templates = tm.list_templates()
     for t in templates:
-        st.caption(t)
+        st.caption(f"{t} (v{tm.get_template(t).get('version', 1)})")
     
     with st.expander("New Template"):
         name = st.text_input("Name", key="tpl_name")
@@ -67,45 +105,66 @@ with tab1:
         confidence = c2.slider("Confidence", 0.0, 1.0, 0.25)
         
         if st.button("Process", type="primary"):
-            reader = load_ocr()
-            
+            jobs = {}
             for file in uploaded:
-                st.write(f"Processing: {file.name}")
-                
-                if file.type == "application/pdf":
-                    images = pdf_to_images(file.read())
-                else:
-                    images = [Image.open(file)]
-                
-                all_ocr = []
-                for img in images:
-                    results = ocr_image(reader, img)
-                    for r in results:
-                        if r["confidence"] >= confidence:
-                            all_ocr.append(r)
-                
-                tpl = template_choice
-                if tpl == "Auto":
-                    texts = [r["text"] for r in all_ocr]
-                    tpl = tm.auto_detect_template(texts) or ""
-                
-                template = tm.get_template(tpl)
-                if template:
-                    extracted = OCRProcessor.process_results(all_ocr, template["fields"])
-                    st.session_state.extractions[file.name] = extracted
-                    st.success(f"{file.name}: {len(extracted)} fields")
-                else:
-                    st.warning(f"{file.name}: No template")
+                while True:
+                    try:
+                        jobs[file.name] = client.submit(file.getvalue(), file.name, file.type,
+                                                        template_choice, confidence)
+                        break
+                    except ServiceBusy as e:
+                        st.info(f"Service busy, retrying {file.name} in {e.retry_after}s")
+                        time.sleep(e.retry_after)
+                    except HTTPError as e:
+                        st.error(f"{file.name}: rejected by service ({e.code})")
+                        break
+            
+            progress = st.progress(0.0, text=f"Queued {len(jobs)} documents")
+            live = st.empty()
+            start = time.time()
             
-            st.success("Done")
+            def report(done_fraction, text):
+                elapsed = time.time() - start
+                if done_fraction > 0:
+                    text += f" · ETA {format_eta(elapsed / done_fraction * (1 - done_fraction))}"
+                progress.progress(min(done_fraction, 1.0), text=text)
+            
+            for i, (name, job_id) in enumerate(jobs.items()):
+                for event in client.events(job_id):
+                    if event["event"] == "page":
+                        pages = event["page_count"] or 1
+                        report((i + (event["page"] + 1) / pages) / len(jobs),
+                               f"{i + 1}/{len(jobs)} {name}: page {event['page'] + 1}/{pages}")
+                    elif event["event"] == "done":
+                        if event["status"] == "failed":
+                            st.error(f"{name}: {event['error']}")
+                        elif event["template"]:
+                            add_result(name, event["extracted"])
+                            latest = Exporter.append_columns(Exporter.empty_columns(), name, event["extracted"])
+                            live.dataframe(pd.DataFrame(latest), use_container_width=True, hide_index=True)
+                        else:
+                            st.warning(f"{name}: No template")
+                        report((i + 1) / len(jobs), f"{i + 1}/{len(jobs)} documents")
+            
+            live.empty()
+            progress.progress(1.0, text=f"Done: {len(jobs)} documents in {format_eta(time.time() - start)}")
         
         if st.session_state.extractions:
-            for doc_name, extracted in st.session_state.extractions.items():
-                with st.expander(doc_name):
-                    for field, data in extracted.items():
-                        st.text_input(field, data.get("value", ""), key=f"{doc_name}_{field}")
-                    
-                    st.download_button("JSON", Exporter.to_json(extracted), f"{doc_name}.json")
+            df = results_frame()
+            c1, c2, c3 = st.columns(3)
+            doc_filter = c1.selectbox("Document", ["All"] + list(st.session_state.extractions.keys()))
+            page_size = c2.selectbox("Rows per page", [50, 100, 500], index=1)
+            view = df if doc_filter == "All" else df[df["Document"] == doc_filter]
+            page_count = max(1, math.ceil(len(view) / page_size))
+            page = c3.number_input("Page", 1, page_count, 1, key=f"page_{doc_filter}_{page_size}")
+            
+            st.dataframe(view.iloc[(page - 1) * page_size:page * page_size],
+                         use_container_width=True, hide_index=True)
+            st.caption(f"{len(view)} fields · {len(st.session_state.extractions)} documents · page {page}/{page_count}")
+            
+            if doc_filter != "All":
+                st.download_button("JSON", Exporter.to_json(st.session_state.extractions[doc_filter]),
+                                   f"{doc_filter}.json")
 
 with tab2:
     st.header("Verify")
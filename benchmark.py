@@ -0,0 +1,223 @@
+# benchmark.py - Hot Path Timings
+# ================================
+#
+#   python benchmark.py                  # run and compare to baseline
+#   python benchmark.py --save-baseline  # record a new baseline
+#   python benchmark.py --pdf            # also time PDF render + rasterise
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+from synthetic_forms import generate_form, load_template, random_template, render_pdf
+
+BASELINE_FILE = "bench_baseline.json"
+SCALES = [1, 5, 25]          # form copies per document
+TEMPLATE_SCALES = [1, 10, 100]
+INDEX_SCALES = [1000]        # templates in the SmartExtractor index
+
+
+def timeit(fn, repeat=5, min_time=0.05):
+    """Median seconds per call of fn()"""
+    fn()  # warm up
+    runs = []
+    for _ in range(repeat):
+        loops = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            loops += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        runs.append(elapsed / loops)
+    return statistics.median(runs)
+
+
+def bench_processor(template, results):
+    from ocr_processor import OCRProcessor
+
+    for scale in SCALES:
+        ocr, _ = generate_form(template, seed=scale, copies=scale)
+        extracted = OCRProcessor.process_results(ocr, template["fields"])
+        results[f"process_results[{len(ocr)} tokens]"] = timeit(
+            lambda: OCRProcessor.process_results(ocr, template["fields"]))
+        yield scale, ocr, extracted
+
+
+def bench_template_manager(template, results):
+    from template_manager import TemplateManager
+
+    rng = random.Random(7)
+    tm = TemplateManager()
+    for n in TEMPLATE_SCALES:
+        tm.templates = {template["name"]: template}
+        for i in range(n - 1):
+            tm.templates[f"synthetic_{i}"] = random_template(rng, f"synthetic_{i}")
+        ocr, _ = generate_form(template, seed=n)
+        texts = [r["text"] for r in ocr]
+        probe = texts[len(texts) // 2]
+        results[f"match_field[{n} templates]"] = timeit(
+            lambda: tm.match_field(probe, template["name"]))
+        results[f"auto_detect_template[{n} templates]"] = timeit(
+            lambda: tm.auto_detect_template(texts))
+
+
+def bench_smart_extractor(template, results):
+    try:
+        from smart_extractor import SmartExtractor
+        extractor = SmartExtractor()
+    except (ImportError, OSError) as e:
+        # OSError: model download failed (offline)
+        print(f"  skip SmartExtractor: {e}")
+        return
+    for scale in SCALES:
+        ocr, _ = generate_form(template, seed=scale, copies=scale)
+        results[f"SmartExtractor.process_ocr_results[{len(ocr)} tokens]"] = timeit(
+            lambda: extractor.process_ocr_results(ocr), repeat=3)
+
+    from template_manager import TemplateManager
+    rng = random.Random(7)
+    tm = TemplateManager()
+    ocr, _ = generate_form(template, seed=1)
+    texts = [r["text"] for r in ocr]
+    for n in INDEX_SCALES:
+        tm.templates = {template["name"]: template}
+        for i in range(n - 1):
+            tm.templates[f"synthetic_{i}"] = random_template(rng, f"synthetic_{i}")
+        indexed = SmartExtractor(tm, embedder=extractor.embedder)
+        results[f"SmartExtractor.search[{n} templates]"] = timeit(
+            lambda: indexed.search(texts, k=1), repeat=3)
+        results[f"SmartExtractor.detect_template[{n} templates]"] = timeit(
+            lambda: indexed.detect_template(texts), repeat=3)
+
+
+def bench_verifier_exporter(extractions, results):
+    from verifier import Verifier
+    from exporter import Exporter
+
+    for scale, extracted in extractions.items():
+        results[f"Verifier.run_all_checks[x{scale}]"] = timeit(
+            lambda: Verifier.run_all_checks(extracted))
+        results[f"Exporter.to_json[x{scale}]"] = timeit(lambda: Exporter.to_json(extracted))
+        results[f"Exporter.to_csv[x{scale}]"] = timeit(lambda: Exporter.to_csv(extracted))
+        results[f"Exporter.to_excel[x{scale}]"] = timeit(lambda: Exporter.to_excel(extracted), repeat=3)
+
+    for n_docs in [10, 100]:
+        batch = {f"doc_{i}.pdf": extracted for i in range(n_docs)}
+        results[f"Exporter.batch_to_excel[{n_docs} docs]"] = timeit(
+            lambda: Exporter.batch_to_excel(batch), repeat=3)
+
+
+def bench_pdf(template, results):
+    try:
+        import fitz
+    except ImportError as e:
+        print(f"  skip PDF: {e}")
+        return
+    from PIL import Image
+
+    for scale in SCALES:
+        ocr, _ = generate_form(template, seed=scale, copies=scale, ascii_only=True)
+        pdf = render_pdf(ocr)
+        results[f"render_pdf[x{scale}]"] = timeit(lambda: render_pdf(ocr), repeat=3)
+
+        def rasterise():
+            doc = fitz.open(stream=pdf, filetype="pdf")
+            for page in doc:
+                pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
+                Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            doc.close()
+        results[f"pdf_to_images[x{scale}]"] = timeit(rasterise, repeat=3)
+
+
+def run(pdf=False):
+    template = load_template()
+    results = {}
+
+    print("OCRProcessor ...")
+    extractions = {}
+    for scale, _, extracted in bench_processor(template, results):
+        extractions[scale] = extracted
+    print("TemplateManager ...")
+    bench_template_manager(template, results)
+    print("SmartExtractor ...")
+    bench_smart_extractor(template, results)
+    print("Verifier / Exporter ...")
+    bench_verifier_exporter(extractions, results)
+    if pdf:
+        print("PDF ...")
+        bench_pdf(template, results)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return list of (name, old, new) that got slower than tolerance"""
+    regressions = []
+    for name, new in results.items():
+        old = baseline.get(name)
+        if old and new > old * (1 + tolerance):
+            regressions.append((name, old, new))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark document-ai hot paths")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    parser.add_argument("--pdf", action="store_true", help="include PyMuPDF render/rasterise")
+    parser.add_argument("--output", help="write this run's timings to a JSON file")
+    args = parser.parse_args()
+
+    # Templates are loaded relative to the repo root
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    results = run(pdf=args.pdf)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get("results", {})
+
+    print()
+    print(f"{'benchmark':<55} {'baseline ms':>12} {'now ms':>10} {'change':>8}")
+    for name, new in results.items():
+        old = baseline.get(name)
+        change = f"{(new / old - 1) * 100:+.0f}%" if old else ""
+        old_ms = f"{old * 1000:.3f}" if old else "-"
+        print(f"{name:<55} {old_ms:>12} {new * 1000:>10.3f} {change:>8}")
+
+    record = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(record, f, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(record, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.tolerance:.0%}:")
+        for name, old, new in regressions:
+            print(f"  {name}: {old * 1000:.3f}ms -> {new * 1000:.3f}ms")
+        return 1
+    if baseline:
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+# client.py - Talk to the Extraction Service
+# ===========================================
+
+import json
+import os
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+DEFAULT_URL = os.environ.get("DOCUMENT_AI_URL", "http://127.0.0.1:8765")
+
+
+class ServiceBusy(Exception):
+    """Service queue is full, retry after `retry_after` seconds"""
+
+    def __init__(self, message, retry_after=2):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ExtractionClient:
+    def __init__(self, base_url=DEFAULT_URL, timeout=30):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _get(self, path):
+        with urlopen(f"{self.base_url}{path}", timeout=self.timeout) as resp:
+            return json.load(resp)
+
+    def health(self):
+        return self._get("/health")
+
+    def is_up(self):
+        try:
+            self.health()
+            return True
+        except OSError:
+            return False
+
+    def list_templates(self):
+        return self._get("/templates")["templates"]
+
+    def submit(self, data, filename="", content_type="application/octet-stream",
+               template=None, confidence=0.0, priority=5):
+        """Queue a document, returns the job id"""
+        query = {"filename": filename, "confidence": confidence, "priority": priority}
+        if template and template != "Auto":
+            query["template"] = template
+        req = Request(f"{self.base_url}/jobs?{urlencode(query)}", data=data, method="POST",
+                      headers={"Content-Type": content_type or "application/octet-stream"})
+        try:
+            with urlopen(req, timeout=self.timeout) as resp:
+                return json.load(resp)["job_id"]
+        except HTTPError as e:
+            if e.code == 429:
+                raise ServiceBusy(json.load(e).get("error", "queue full"),
+                                  int(e.headers.get("Retry-After", 2)))
+            raise
+
+    def status(self, job_id):
+        return self._get(f"/jobs/{job_id}")
+
+    def events(self, job_id):
+        """Yield page/done events as the service produces them"""
+        with urlopen(f"{self.base_url}/jobs/{job_id}/events", timeout=None) as resp:
+            for line in resp:
+                if line.strip():
+                    event = json.loads(line)
+                    yield event
+                    if event.get("event") == "done":
+                        return
@@ -5,6 +5,25 @@ import io
 
 class Exporter:
     
+    COLUMNS = ["Document", "Field", "Value", "Raw", "Type", "Confidence"]
+    
+    @staticmethod
+    def empty_columns():
+        """Columnar store for many documents: one list per column"""
+        return {col: [] for col in Exporter.COLUMNS}
+    
+    @staticmethod
+    def append_columns(columns, doc_name, extracted):
+        """Append one document's fields to a columnar store"""
+        for field_name, data in extracted.items():
+            columns["Document"].append(doc_name)
+            columns["Field"].append(field_name)
+            columns["Value"].append(data.get("value", ""))
+            columns["Raw"].append(data.get("raw", ""))
+            columns["Type"].append(data.get("type", ""))
+            columns["Confidence"].append(data.get("confidence", 0))
+        return columns
+    
     @staticmethod
     def to_excel(extracted_data, filename="export.xlsx"):
         """Export to Excel"""
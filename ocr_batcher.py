@@ -0,0 +1,152 @@
+# ocr_batcher.py - Cross-Document OCR Micro-Batching
+# ===================================================
+#
+# Pages from every in-flight document are queued here and handed to
+# easyocr's readtext_batched in small batches, so the per-call model
+# overhead is shared. Each caller gets a Future for its own page.
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import pipeline
+
+
+class MicroBatcher:
+    """Single OCR thread that groups queued pages into micro-batches.
+
+    A batch is flushed when it reaches the size the latency budget allows
+    or when its oldest page has waited max_wait seconds, so a lone document
+    is never held long.
+
+    The budget is relative, not in seconds: a batch may take up to
+    latency_factor times as long as OCR'ing one page alone. Batch size is
+    then latency_factor * (seconds for a lone page) / (seconds per page in
+    a batch), both running averages. This holds the same on CPU, where one
+    page takes many seconds, and on GPU. Until both are measured the size
+    starts at START_BATCH.
+
+    Pages are bucketed by padded size because readtext_batched needs equal
+    shapes; padding is added right/bottom so bbox coordinates are unchanged.
+    """
+
+    BUCKET_PX = 128
+    START_BATCH = 4
+
+    def __init__(self, reader_fn, latency_factor=4.0, max_wait=0.01, max_batch=16,
+                 recognizer_batch_size=16):
+        self.reader_fn = reader_fn
+        self.latency_factor = latency_factor
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.recognizer_batch_size = recognizer_batch_size
+        self._buckets = {}          # (h, w) -> deque of (submitted, array, future)
+        self._cond = threading.Condition()
+        self._single = None         # moving average seconds for a lone page
+        self._per_page = None       # moving average seconds per page in a batch
+        self.batches = 0
+        self.pages = 0
+        self._thread = threading.Thread(target=self._loop, name="ocr-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, image):
+        """Queue a PIL image, returns a Future of ocr_image() style results"""
+        import numpy as np
+        array = np.array(image.convert("RGB"))
+        key = (math.ceil(array.shape[0] / self.BUCKET_PX), math.ceil(array.shape[1] / self.BUCKET_PX))
+        future = Future()
+        with self._cond:
+            self._buckets.setdefault(key, deque()).append((time.monotonic(), array, future))
+            self._cond.notify()
+        return future
+
+    def target_size(self):
+        """Pages per batch that should finish within the latency budget"""
+        if not self._per_page:
+            return min(self.START_BATCH, self.max_batch)
+        # Without a lone-page timing assume batching saves nothing
+        single = self._single or self._per_page
+        size = int(self.latency_factor * single / self._per_page)
+        return max(1, min(self.max_batch, size))
+
+    def stats(self):
+        with self._cond:
+            waiting = sum(len(q) for q in self._buckets.values())
+        return {"waiting": waiting, "batches": self.batches, "pages": self.pages,
+                "target_size": self.target_size(), "seconds_single": self._single,
+                "seconds_per_page": self._per_page}
+
+    def _next_batch(self):
+        with self._cond:
+            while True:
+                live = {k: q for k, q in self._buckets.items() if q}
+                if not live:
+                    self._cond.wait()
+                    continue
+                # Serve the bucket holding the oldest page
+                key = min(live, key=lambda k: live[k][0][0])
+                queue = live[key]
+                deadline = queue[0][0] + self.max_wait
+                size = self.target_size()
+                now = time.monotonic()
+                if len(queue) >= size or now >= deadline:
+                    return [queue.popleft() for _ in range(min(size, len(queue)))]
+                self._cond.wait(deadline - now)
+
+    def _loop(self):
+        try:
+            reader = self.reader_fn()
+        except Exception as e:
+            reader, error = None, e
+        while True:
+            batch = self._next_batch()
+            futures = [f for _, _, f in batch if f.set_running_or_notify_cancel()]
+            if not futures:
+                continue
+            try:
+                if reader is None:
+                    raise error
+                self._run_batch(reader, [a for _, a, f in batch if f in futures], futures)
+            except Exception as e:
+                # Never leave a caller waiting on a future we dropped
+                for f in futures:
+                    if not f.done():
+                        f.set_exception(e)
+
+    def _run_batch(self, reader, arrays, futures):
+        start = time.perf_counter()
+        results = self._recognize(reader, arrays)
+        elapsed = time.perf_counter() - start
+        if len(results) != len(arrays):
+            raise RuntimeError(f"OCR returned {len(results)} results for {len(arrays)} pages")
+
+        if len(arrays) == 1:
+            self._single = self._average(self._single, elapsed)
+        else:
+            self._per_page = self._average(self._per_page, elapsed / len(arrays))
+        self.batches += 1
+        self.pages += len(arrays)
+        for f, r in zip(futures, results):
+            f.set_result(pipeline.format_results(r))
+
+    @staticmethod
+    def _average(old, new):
+        return new if old is None else 0.8 * old + 0.2 * new
+
+    def _recognize(self, reader, arrays):
+        import numpy as np
+        if len(arrays) == 1 or not hasattr(reader, "readtext_batched"):
+            return [reader.readtext(a, batch_size=self.recognizer_batch_size) for a in arrays]
+
+        height = max(a.shape[0] for a in arrays)
+        width = max(a.shape[1] for a in arrays)
+        padded = []
+        for a in arrays:
+            if a.shape[:2] != (height, width):
+                canvas = np.full((height, width, 3), 255, dtype=a.dtype)
+                canvas[:a.shape[0], :a.shape[1]] = a
+                a = canvas
+            padded.append(a)
+        return reader.readtext_batched(padded, batch_size=self.recognizer_batch_size)
@@ -98,6 +98,8 @@ class OCRProcessor:
         match = re.search(pattern, text)
         return match.group() if match else None
     
+    TYPED_FIELDS = ("phone", "mobile", "email", "date", "date_bs", "currency", "amount", "pan")
+    
     @staticmethod
     def validate_and_extract(text, field_type):
         """Validate and extract based on field type"""
@@ -117,67 +119,159 @@ class OCRProcessor:
             return extractor(text)
         return OCRProcessor.clean_text(text)
     
+    # Candidate scoring
+    LABEL_THRESHOLD = 75      # partial_ratio a token needs to count as a label hit
+    SAME_LINE_PX = 20
+    NEXT_LINE_PX = 50
+    DISTANCE_SCALE = 300.0    # px at which proximity decays to 1/e
+    NEXT_LINE_WEIGHT = 0.6    # values to the right beat values below
+    UNTYPED_WEIGHT = 0.8      # text fields get no type-extractor evidence
+    LABEL_LIKE_PENALTY = 0.7  # a token that is itself a label is a poor value
+    
+    @staticmethod
+    def _token_boxes(ocr_results):
+        """(left, right, top) per token from easyocr 4-point boxes"""
+        import numpy as np
+        boxes = np.zeros((len(ocr_results), 3), dtype=np.float32)
+        for n, item in enumerate(ocr_results):
+            bbox = item.get("bbox") or [[0, 0]]
+            xs = [p[0] for p in bbox]
+            boxes[n] = (min(xs), max(xs), bbox[0][1])
+        return boxes
+    
     @staticmethod
-    def find_value_near_label(ocr_results, label_index, direction="right"):
-        """Find value near a label"""
-        if label_index >= len(ocr_results) - 1:
-            return None
+    def geometry_scores(boxes, label_rows):
+        """Proximity of every token to each label token, shape (labels, tokens).
         
-        label_item = ocr_results[label_index]
-        label_bbox = label_item.get("bbox", [[0,0]])
-        label_y = label_bbox[0][1] if label_bbox else 0
+        Same line and right of the label decays with the horizontal gap, the
+        next line down decays with the offset, anything else scores 0.
+        """
+        import numpy as np
+        P = OCRProcessor
+        left, top = boxes[:, 0], boxes[:, 2]
+        labels = boxes[label_rows]
         
-        candidates = []
+        dy = top[None, :] - labels[:, 2, None]
+        same_line = (np.abs(dy) < P.SAME_LINE_PX) & (left[None, :] > labels[:, 0, None])
+        next_line = (dy >= P.SAME_LINE_PX) & (dy < P.NEXT_LINE_PX)
         
-        for i, item in enumerate(ocr_results):
-            if i == label_index:
-                continue
-            
-            item_bbox = item.get("bbox", [[0,0]])
-            item_y = item_bbox[0][1] if item_bbox else 0
-            
-            # Same line (within 20 pixels)
-            if abs(item_y - label_y) < 20:
-                if direction == "right" and i > label_index:
-                    candidates.append(item)
-            
-            # Next line
-            elif item_y > label_y and item_y - label_y < 50:
-                candidates.append(item)
+        gap = np.clip(left[None, :] - labels[:, 1, None], 0, None)
+        offset = np.abs(left[None, :] - labels[:, 0, None]) + dy
+        scores = np.where(same_line, np.exp(-gap / P.DISTANCE_SCALE), 0.0)
+        scores = np.where(next_line, P.NEXT_LINE_WEIGHT * np.exp(-offset / P.DISTANCE_SCALE), scores)
+        scores[np.arange(len(label_rows)), label_rows] = 0.0
+        return scores
+    
+    @staticmethod
+    def label_scores(texts, template_fields):
+        """Best label partial_ratio per (field, token), shape (fields, tokens)"""
+        import numpy as np
+        from rapidfuzz import process
         
-        if candidates:
-            return candidates[0]["text"]
-        return None
+        labels, starts = [], []
+        for field in template_fields:
+            starts.append(len(labels))
+            labels.extend(l.lower() for l in field.get("labels", [field["name"]]) or [field["name"]])
+        
+        matrix = process.cdist(labels, [t.lower() for t in texts], scorer=fuzz.partial_ratio,
+                               score_cutoff=OCRProcessor.LABEL_THRESHOLD, dtype=np.float32)
+        return np.maximum.reduceat(matrix, starts, axis=0)
     
     @staticmethod
-    def process_results(ocr_results, template_fields):
-        """Process OCR results with smart extraction"""
-        from rapidfuzz import fuzz, process
+    def field_candidates(ocr_results, template_fields, top_k=None):
+        """Value candidates per field, best first, top_k of them if given.
+        
+        Each candidate's score is label similarity x geometric proximity x
+        type-extractor success x value OCR confidence, all in [0, 1].
+        """
+        import numpy as np
+        P = OCRProcessor
+        
+        if not ocr_results or not template_fields:
+            return [[] for _ in template_fields]
         
-        extracted = {}
         texts = [r["text"] for r in ocr_results]
+        boxes = P._token_boxes(ocr_results)
+        value_conf = np.array([r.get("confidence", 0) for r in ocr_results], dtype=np.float32)
         
-        for field in template_fields:
-            field_name = field["name"]
+        sims = P.label_scores(texts, template_fields) / 100.0
+        hit = sims > P.LABEL_THRESHOLD / 100.0
+        token_weight = (0.5 + 0.5 * value_conf) * np.where(hit.any(axis=0), 1 - P.LABEL_LIKE_PENALTY, 1.0)
+        
+        candidates = []
+        for f, field in enumerate(template_fields):
             field_type = field.get("type", "text")
-            labels = field.get("labels", [field_name])
+            label_rows = np.flatnonzero(hit[f])
+            if not len(label_rows):
+                candidates.append([])
+                continue
+            
+            proximity = P.geometry_scores(boxes, label_rows) * sims[f, label_rows, None]
+            best_label = label_rows[proximity.argmax(axis=0)]
+            scores = proximity.max(axis=0) * token_weight
             
-            # Find matching label
-            for i, text in enumerate(texts):
-                for label in labels:
-                    if fuzz.partial_ratio(label.lower(), text.lower()) > 75:
-                        # Found label, look for value
-                        value = OCRProcessor.find_value_near_label(ocr_results, i)
-                        
-                        if value:
-                            clean_value = OCRProcessor.validate_and_extract(value, field_type)
-                            if clean_value:
-                                extracted[field_name] = {
-                                    "value": clean_value,
-                                    "raw": value,
-                                    "type": field_type,
-                                    "confidence": ocr_results[i].get("confidence", 0)
-                                }
-                        break
-        
-        return extracted
\ No newline at end of file
+            ranked = []
+            for j in np.flatnonzero(scores > 0)[np.argsort(-scores[scores > 0], kind="stable")]:
+                value = P.validate_and_extract(texts[j], field_type)
+                if not value:
+                    continue
+                typed = field_type in P.TYPED_FIELDS
+                score = float(scores[j]) * (1.0 if typed else P.UNTYPED_WEIGHT)
+                ranked.append({
+                    "token": int(j),
+                    "value": value,
+                    "raw": texts[j],
+                    "score": round(score, 4),
+                    "label_confidence": float(ocr_results[best_label[j]].get("confidence", 0)),
+                    "value_confidence": float(value_conf[j]),
+                })
+                if top_k and len(ranked) >= top_k:
+                    break
+            candidates.append(ranked)
+        return candidates
+    
+    @staticmethod
+    def process_results(ocr_results, template_fields, top_k=3):
+        """Process OCR results with smart extraction
+        
+        Scores every candidate per field, then assigns tokens greedily by
+        score over all fields at once so no two fields share a token. top_k
+        only limits the alternatives reported under "candidates".
+        
+        "confidence" is the OCR confidence of the chosen value token and
+        "score" the composite candidate score.
+        """
+        candidates = OCRProcessor.field_candidates(ocr_results, template_fields)
+        
+        pairs = sorted(
+            ((c["score"], f, n) for f, ranked in enumerate(candidates) for n, c in enumerate(ranked)),
+            key=lambda p: -p[0]
+        )
+        chosen, taken = {}, set()
+        for score, f, n in pairs:
+            token = candidates[f][n]["token"]
+            if f in chosen or token in taken:
+                continue
+            chosen[f] = n
+            taken.add(token)
+        
+        extracted = {}
+        for f, field in enumerate(template_fields):
+            if f not in chosen:
+                continue
+            best = candidates[f][chosen[f]]
+            extracted[field["name"]] = {
+                "value": best["value"],
+                "raw": best["raw"],
+                "type": field.get("type", "text"),
+                "confidence": best["value_confidence"],
+                "score": best["score"],
+                "label_confidence": best["label_confidence"],
+                "candidates": [
+                    {"value": c["value"], "raw": c["raw"], "score": c["score"],
+                     "confidence": c["value_confidence"]}
+                    for c in candidates[f][:top_k]
+                ]
+            }
+        
+        return extracted
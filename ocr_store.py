@@ -0,0 +1,59 @@
+# ocr_store.py - Raw OCR Tokens per Document
+# ===========================================
+#
+# Keeping the tokens lets us re-run field extraction against a new template
+# version without OCR'ing the document again (see reextract.py).
+
+import hashlib
+import json
+import os
+import time
+
+STORE_DIR = "ocr_store"
+
+
+class OCRStore:
+    def __init__(self, root=STORE_DIR):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    @staticmethod
+    def document_id(data):
+        """Content hash, so re-uploading a file replaces its record"""
+        return hashlib.sha1(data).hexdigest()
+
+    def path(self, doc_id):
+        return f"{self.root}/{doc_id}.json"
+
+    def save(self, doc_id, filename, ocr, confidence=0.0, template=None,
+             template_version=None, extracted=None):
+        """Store unfiltered OCR tokens plus the extraction made from them"""
+        record = {
+            "doc_id": doc_id,
+            "filename": filename,
+            "confidence": confidence,
+            "ocr": ocr,
+            "template": template,
+            "template_version": template_version,
+            "extracted": extracted or {},
+            "updated": time.time(),
+        }
+        self.write(record)
+        return record
+
+    def write(self, record):
+        tmp = self.path(record["doc_id"]) + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(record, f, ensure_ascii=False)
+        os.replace(tmp, self.path(record["doc_id"]))
+
+    def load(self, doc_id):
+        return load_record(self.path(doc_id))
+
+    def list_paths(self):
+        return [f"{self.root}/{file}" for file in sorted(os.listdir(self.root)) if file.endswith('.json')]
+
+
+def load_record(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
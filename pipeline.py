@@ -0,0 +1,83 @@
+# pipeline.py - Document -> Pages -> OCR -> Fields
+# ================================================
+
+import io
+
+from ocr_processor import OCRProcessor
+
+# easyocr (and torch behind it), fitz and numpy are imported on first use
+# so importing this module stays cheap.
+
+def load_reader():
+    """Build the easyocr reader (slow, do it once)"""
+    import ssl
+    ssl._create_default_https_context = ssl._create_unverified_context
+    import easyocr
+    return easyocr.Reader(['en', 'ne'], gpu=False)
+
+def load_detector(template_manager):
+    """SmartExtractor over template_manager for Auto template detection.
+
+    None when sentence-transformers/faiss are not installed or the model
+    can't be loaded; extract_fields then falls back to fuzzy matching.
+    """
+    try:
+        from smart_extractor import SmartExtractor
+        return SmartExtractor(template_manager)
+    except (ImportError, OSError):
+        return None
+
+def is_pdf(data, filename="", content_type=""):
+    return (content_type == "application/pdf"
+            or filename.lower().endswith(".pdf")
+            or data[:4] == b"%PDF")
+
+def pdf_to_images(pdf_bytes):
+    import fitz
+    from PIL import Image
+    doc = fitz.open(stream=pdf_bytes, filetype="pdf")
+    images = []
+    for page in doc:
+        pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        images.append(img)
+    doc.close()
+    return images
+
+def load_images(data, filename="", content_type=""):
+    """Split an uploaded file into page images"""
+    from PIL import Image
+    if is_pdf(data, filename, content_type):
+        return pdf_to_images(data)
+    return [Image.open(io.BytesIO(data))]
+
+def format_results(results):
+    """easyocr (bbox, text, conf) tuples -> dicts of plain ints/floats"""
+    return [
+        {"text": t, "confidence": float(c), "bbox": [[int(x), int(y)] for x, y in b]}
+        for b, t, c in results
+    ]
+
+def ocr_image(reader, image):
+    import numpy as np
+    return format_results(reader.readtext(np.array(image)))
+
+def extract_fields(all_ocr, template_manager, template_name=None, detector=None):
+    """Pick a template (auto-detect when none given) and extract fields.
+
+    Auto detection uses detector (see load_detector) when given, otherwise
+    TemplateManager's fuzzy matching. Returns (template_name, extracted);
+    template_name is None when no template matched.
+    """
+    tpl = template_name
+    if not tpl or tpl == "Auto":
+        texts = [r["text"] for r in all_ocr]
+        if detector:
+            tpl = detector.detect_template(texts)
+        else:
+            tpl = template_manager.auto_detect_template(texts)
+
+    template = template_manager.get_template(tpl) if tpl else None
+    if not template:
+        return None, {}
+    return tpl, OCRProcessor.process_results(all_ocr, template["fields"])
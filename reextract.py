@@ -0,0 +1,131 @@
+# reextract.py - Replay Stored OCR Against New Templates
+# =======================================================
+#
+#   python reextract.py                          # every doc vs latest version of its template
+#   python reextract.py --template insurance_form --version 3
+#   python reextract.py --template insurance_form --all-documents   # docs of any template
+#   python reextract.py --write --report changes.json
+#
+# No OCR is run: tokens come from ocr_store/ (saved by service.py).
+
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from ocr_processor import OCRProcessor
+from ocr_store import OCRStore, load_record
+from template_manager import TemplateManager
+
+_templates = {}
+
+
+def diff_fields(old, new):
+    """Compare two extractions by field value"""
+    changes = {"added": {}, "removed": {}, "changed": {}}
+    for field, data in new.items():
+        if field not in old:
+            changes["added"][field] = data.get("value")
+        elif old[field].get("value") != data.get("value"):
+            changes["changed"][field] = {"old": old[field].get("value"), "new": data.get("value")}
+    for field, data in old.items():
+        if field not in new:
+            changes["removed"][field] = data.get("value")
+    return changes
+
+
+def _init(templates):
+    global _templates
+    _templates = templates
+
+
+def _replay(args):
+    """Worker: re-extract one stored document, returns its report entry"""
+    path, only_template, force, write = args
+    record = load_record(path)
+    if only_template and not force and record.get("template") != only_template:
+        return None
+    name = only_template or record.get("template")
+    template = _templates.get(name)
+    if not template:
+        return None
+
+    ocr = [r for r in record["ocr"] if r["confidence"] >= record.get("confidence", 0)]
+    extracted = OCRProcessor.process_results(ocr, template["fields"])
+    changes = diff_fields(record.get("extracted", {}), extracted)
+
+    if write:
+        record.update(template=name, template_version=template.get("version", 1), extracted=extracted)
+        OCRStore(os.path.dirname(path)).write(record)
+
+    return {
+        "doc_id": record["doc_id"],
+        "filename": record.get("filename"),
+        "template": name,
+        "from_version": record.get("template_version"),
+        "to_version": template.get("version", 1),
+        "changes": changes,
+    }
+
+
+def reextract(store, tm, template=None, version=None, write=False, workers=None, all_documents=False):
+    """Replay OCRProcessor.process_results over the whole store in parallel
+
+    With a template, only documents extracted with that template are
+    replayed unless all_documents forces every document onto it.
+    """
+    if template:
+        chosen = tm.get_template_version(template, version)
+        if not chosen:
+            raise ValueError(f"Unknown template {template} v{version}, "
+                             f"saved versions: {tm.list_versions(template)}")
+        templates = {template: chosen}
+    else:
+        templates = dict(tm.templates)
+
+    paths = store.list_paths()
+    jobs = [(p, template, all_documents, write) for p in paths]
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(templates,)) as pool:
+        return [r for r in pool.map(_replay, jobs, chunksize=chunksize) if r]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-extract stored documents without OCR")
+    parser.add_argument("--template", help="replay the documents of this template")
+    parser.add_argument("--version", type=int, help="template version (default latest)")
+    parser.add_argument("--all-documents", action="store_true",
+                        help="with --template, replay documents extracted with other templates too")
+    parser.add_argument("--store", default="ocr_store")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--write", action="store_true", help="save the new extractions")
+    parser.add_argument("--report", help="write the full change report as JSON")
+    args = parser.parse_args()
+
+    results = reextract(OCRStore(args.store), TemplateManager(), args.template, args.version,
+                        args.write, args.workers, args.all_documents)
+
+    field_counts = {}
+    changed_docs = 0
+    for r in results:
+        c = r["changes"]
+        touched = list(c["added"]) + list(c["removed"]) + list(c["changed"])
+        if touched:
+            changed_docs += 1
+        for field in touched:
+            field_counts[field] = field_counts.get(field, 0) + 1
+
+    print(f"{len(results)} documents replayed, {changed_docs} with changed fields")
+    for field, count in sorted(field_counts.items(), key=lambda x: -x[1]):
+        print(f"  {field}: {count}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
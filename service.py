@@ -0,0 +1,431 @@
+# service.py - Local Async Extraction Service
+# ============================================
+#
+#   python service.py --port 8765 --workers 4
+#
+#   POST /jobs?filename=a.pdf&template=insurance_form&confidence=0.25&priority=5
+#        body = raw file bytes             -> 202 {"job_id": ...}  (429 when full, 413 too large)
+#   GET  /jobs/<id>                        -> status, per-page results, fields
+#   GET  /jobs/<id>/events                 -> NDJSON stream of page/done events
+#   GET  /templates                        -> template names
+#   GET  /health                           -> queue depth, reader state
+
+import argparse
+import concurrent.futures
+import heapq
+import itertools
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from template_manager import TemplateManager
+from ocr_store import OCRStore
+from ocr_batcher import MicroBatcher
+import pipeline
+
+DEFAULT_PORT = 8765
+
+
+class QueueFull(Exception):
+    """Raised when a job is refused by admission control"""
+
+
+class UploadTooLarge(Exception):
+    """Raised when a single upload exceeds the per-upload cap"""
+
+
+class Job:
+    def __init__(self, data, filename="", content_type="", template=None, confidence=0.0, priority=5):
+        self.id = uuid.uuid4().hex
+        self.doc_id = OCRStore.document_id(data)
+        self.data = data
+        self.size = len(data)
+        self.filename = filename
+        self.content_type = content_type
+        self.template = template
+        self.confidence = confidence
+        self.priority = priority
+        self.status = "queued"
+        self.error = None
+        self.pages = []
+        self.page_count = None
+        self.extracted = {}
+        self.template_used = None
+        self.template_version = None
+        self.ocr = []
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.events = []
+        self.changed = threading.Condition()
+
+    def emit(self, event):
+        with self.changed:
+            self.events.append(event)
+            self.changed.notify_all()
+
+    def done(self):
+        return self.status in ("done", "failed")
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "doc_id": self.doc_id,
+            "filename": self.filename,
+            "status": self.status,
+            "error": self.error,
+            "priority": self.priority,
+            "page_count": self.page_count,
+            "pages": self.pages,
+            "template": self.template_used,
+            "template_version": self.template_version,
+            "extracted": self.extracted,
+            "submitted": self.submitted,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+
+class JobQueue:
+    """Bounded priority queue (lower priority value runs first, FIFO on ties).
+
+    Admission control refuses new jobs once either the number of waiting
+    jobs or the upload bytes held by waiting and running jobs would exceed
+    the limits, so a burst queues up to a fixed memory budget instead of
+    growing without bound. A running job's bytes count until release().
+    """
+
+    def __init__(self, max_jobs=32, max_bytes=256 * 1024 * 1024, max_upload=32 * 1024 * 1024):
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self.max_upload = min(max_upload, max_bytes)
+        self._heap = []
+        self._counter = itertools.count()
+        self._bytes = 0
+        self._running = 0
+        self._cond = threading.Condition()
+
+    def _check(self, size):
+        if size > self.max_upload:
+            raise UploadTooLarge(f"{size} bytes, limit {self.max_upload}")
+        if len(self._heap) >= self.max_jobs:
+            raise QueueFull(f"{len(self._heap)} jobs waiting")
+        if self._bytes + size > self.max_bytes:
+            raise QueueFull(f"{self._bytes} bytes held")
+
+    def admit(self, size):
+        """Raise QueueFull if a job of this size would be refused right now"""
+        with self._cond:
+            self._check(size)
+
+    def put(self, job):
+        with self._cond:
+            self._check(job.size)
+            heapq.heappush(self._heap, (job.priority, next(self._counter), job))
+            self._bytes += job.size
+            self._cond.notify()
+            return len(self._heap)
+
+    def get(self):
+        with self._cond:
+            while not self._heap:
+                self._cond.wait()
+            _, _, job = heapq.heappop(self._heap)
+            self._running += 1
+            return job
+
+    def release(self, job):
+        """A job taken with get() has finished; free its share of the budget"""
+        with self._cond:
+            self._bytes -= job.size
+            self._running -= 1
+
+    def stats(self):
+        with self._cond:
+            return {"waiting": len(self._heap), "running": self._running, "bytes": self._bytes,
+                    "max_jobs": self.max_jobs, "max_bytes": self.max_bytes,
+                    "max_upload": self.max_upload}
+
+
+class ExtractionService:
+    def __init__(self, workers=4, max_jobs=32, max_bytes=256 * 1024 * 1024, keep_jobs=1000, store=None,
+                 batching=True, latency_factor=4.0, max_wait=0.01, max_upload=32 * 1024 * 1024,
+                 page_timeout=600.0):
+        self.queue = JobQueue(max_jobs, max_bytes, max_upload)
+        self.store = store or OCRStore()
+        self.jobs = OrderedDict()
+        self.keep_jobs = keep_jobs
+        self.templates = TemplateManager()
+        self._lock = threading.Lock()
+        self._reader = None
+        self._reader_ready = threading.Event()
+        self._reader_error = None
+        self._reader_lock = threading.Lock()
+        self.workers = workers
+        self.batching = batching
+        self.latency_factor = latency_factor
+        self.max_wait = max_wait
+        self.page_timeout = page_timeout    # seconds a job waits for one page's OCR
+        self.batcher = None
+        self.detector = None        # SmartExtractor for Auto, fuzzy matching until loaded
+
+    def start(self):
+        """Warm the OCR reader and start worker threads"""
+        threading.Thread(target=self._warm, name="ocr-warmup", daemon=True).start()
+        if self.batching:
+            # Job workers only decode and extract; OCR runs on the batcher thread
+            self.batcher = MicroBatcher(self.reader, self.latency_factor, self.max_wait)
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f"ocr-worker-{i}", daemon=True).start()
+        return self
+
+    def _warm(self):
+        try:
+            self._reader = pipeline.load_reader()
+        except Exception as e:
+            self._reader_error = e
+        self._reader_ready.set()
+        self.detector = pipeline.load_detector(self.templates)
+
+    def reader(self):
+        self._reader_ready.wait()
+        if self._reader_error:
+            raise RuntimeError(f"OCR reader failed to load: {self._reader_error}")
+        return self._reader
+
+    def submit(self, job):
+        position = self.queue.put(job)
+        with self._lock:
+            self.jobs[job.id] = job
+            self._evict()
+        return position
+
+    def _evict(self):
+        while len(self.jobs) > self.keep_jobs:
+            oldest_id, oldest = next(iter(self.jobs.items()))
+            if not oldest.done():
+                break
+            self.jobs.pop(oldest_id)
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            try:
+                self._run(job)
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.data = None
+                self.queue.release(job)
+                job.finished = time.time()
+                job.emit({"event": "done", "status": job.status, "error": job.error,
+                          "template": job.template_used, "extracted": job.extracted})
+
+    def _run(self, job):
+        job.status = "running"
+        job.started = time.time()
+
+        images = pipeline.load_images(job.data, job.filename, job.content_type)
+        job.page_count = len(images)
+        job.emit({"event": "started", "page_count": job.page_count})
+
+        pending = []
+        if self.batcher:
+            pending = [self.batcher.submit(img) for img in images]
+            ocr_pages = (f.result(timeout=self.page_timeout) for f in pending)
+        else:
+            ocr_pages = (self._ocr(img) for img in images)
+
+        raw = []
+        try:
+            for page_no, page_ocr in enumerate(ocr_pages):
+                raw.extend(page_ocr)
+                results = [r for r in page_ocr if r["confidence"] >= job.confidence]
+                job.ocr.extend(results)
+                page = {"page": page_no, "tokens": len(results), "ocr": results}
+                job.pages.append(page)
+                job.emit(dict(page, event="page", page_count=job.page_count))
+        except concurrent.futures.TimeoutError:
+            raise RuntimeError(f"OCR of page {len(job.pages)} timed out after {self.page_timeout:g}s") from None
+        finally:
+            # On failure or timeout, drop this job's pages still queued in the batcher
+            for f in pending:
+                f.cancel()
+
+        self.templates.refresh()
+        job.template_used, job.extracted = pipeline.extract_fields(job.ocr, self.templates, job.template,
+                                                                  self.detector)
+        if job.template_used:
+            job.template_version = self.templates.get_template(job.template_used).get("version", 1)
+        self.store.save(job.doc_id, job.filename, raw, job.confidence,
+                        job.template_used, job.template_version, job.extracted)
+        job.status = "done"
+
+    def _ocr(self, image):
+        reader = self.reader()
+        with self._reader_lock:
+            return pipeline.ocr_image(reader, image)
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.0"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _json(self, code, payload, headers=None):
+            body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            for k, v in (headers or {}).items():
+                self.send_header(k, v)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _discard(self, length):
+            while length > 0:
+                chunk = self.rfile.read(min(length, 64 * 1024))
+                if not chunk:
+                    break
+                length -= len(chunk)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != "/jobs":
+                return self._json(404, {"error": "not found"})
+            q = {k: v[0] for k, v in parse_qs(url.query).items()}
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+            except ValueError:
+                return self._json(400, {"error": "invalid Content-Length"})
+            if length <= 0:
+                return self._json(400, {"error": "empty body"})
+            try:
+                # Refuse before buffering the upload
+                service.queue.admit(length)
+            except UploadTooLarge as e:
+                self._discard(length)
+                return self._json(413, {"error": f"upload too large: {e}"})
+            except QueueFull as e:
+                self._discard(length)
+                return self._json(429, {"error": f"queue full: {e}"}, {"Retry-After": "2"})
+            data = self.rfile.read(length)
+            try:
+                job = Job(
+                    data,
+                    filename=q.get("filename", ""),
+                    content_type=self.headers.get("Content-Type", ""),
+                    template=q.get("template") or None,
+                    confidence=float(q.get("confidence", 0)),
+                    priority=int(q.get("priority", 5)),
+                )
+            except ValueError as e:
+                return self._json(400, {"error": str(e)})
+            try:
+                position = service.submit(job)
+            except UploadTooLarge as e:
+                return self._json(413, {"error": f"upload too large: {e}"})
+            except QueueFull as e:
+                return self._json(429, {"error": f"queue full: {e}"}, {"Retry-After": "2"})
+            self._json(202, {"job_id": job.id, "status": job.status, "position": position})
+
+        def do_GET(self):
+            parts = [p for p in urlparse(self.path).path.split("/") if p]
+            if parts == ["health"]:
+                return self._json(200, {"reader_ready": service._reader_ready.is_set(),
+                                        "queue": service.queue.stats(),
+                                        "batcher": service.batcher.stats() if service.batcher else None})
+            if parts == ["templates"]:
+                service.templates.refresh()
+                return self._json(200, {"templates": service.templates.list_templates()})
+            if len(parts) >= 2 and parts[0] == "jobs":
+                job = service.get(parts[1])
+                if not job:
+                    return self._json(404, {"error": "unknown job"})
+                if len(parts) == 2:
+                    return self._json(200, job.to_dict())
+                if parts[2:] == ["events"]:
+                    return self._stream(job)
+            self._json(404, {"error": "not found"})
+
+        def _stream(self, job):
+            """Newline-delimited JSON events until the job finishes"""
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            sent = 0
+            while True:
+                with job.changed:
+                    while sent >= len(job.events):
+                        job.changed.wait(timeout=15)
+                        if sent >= len(job.events):
+                            break
+                    pending = job.events[sent:]
+                if not pending:
+                    # keepalive so idle connections are not dropped
+                    pending = [{"event": "waiting", "status": job.status}]
+                else:
+                    sent += len(pending)
+                try:
+                    for event in pending:
+                        self.wfile.write(json.dumps(event, ensure_ascii=False).encode('utf-8') + b"\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    return
+                if pending[-1].get("event") == "done":
+                    return
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, **kwargs):
+    """Start the service in background threads, returns (server, service)"""
+    service = ExtractionService(**kwargs).start()
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="extraction-http", daemon=True).start()
+    return server, service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local document extraction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=4, help="documents processed concurrently")
+    parser.add_argument("--max-jobs", type=int, default=32, help="jobs allowed to wait in the queue")
+    parser.add_argument("--max-mb", type=int, default=256, help="upload bytes held by waiting and running jobs")
+    parser.add_argument("--max-upload-mb", type=int, default=32, help="largest single upload accepted")
+    parser.add_argument("--no-batching", action="store_true", help="OCR one page per call")
+    parser.add_argument("--latency-factor", type=float, default=4.0,
+                        help="an OCR batch may take this many times a single page's time")
+    parser.add_argument("--max-wait-ms", type=float, default=10, help="longest a page waits for batch-mates")
+    parser.add_argument("--page-timeout", type=float, default=600,
+                        help="seconds a job waits for one page's OCR before failing")
+    args = parser.parse_args()
+
+    server, _ = serve(args.host, args.port, workers=args.workers,
+                      max_jobs=args.max_jobs, max_bytes=args.max_mb * 1024 * 1024,
+                      max_upload=args.max_upload_mb * 1024 * 1024,
+                      batching=not args.no_batching, latency_factor=args.latency_factor,
+                      max_wait=args.max_wait_ms / 1000, page_timeout=args.page_timeout)
+    print(f"Listening on http://{args.host}:{args.port}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
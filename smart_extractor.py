@@ -1,46 +1,218 @@
 # smart_extractor.py - LangChain + FAISS Extraction
 
-from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
 import re
+import threading
 from field_config import INSURANCE_FORM_FIELDS, VALIDATION_RULES
 
 class SmartExtractor:
-    def __init__(self):
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
+    # field_config.py fields are indexed as one more template
+    LEGACY_TEMPLATE = "field_config"
+    
+    # Label id = template slot << SLOT_BITS | label number
+    SLOT_BITS = 16
+    HNSW_M = 32
+    EF_SEARCH = 64
+    # Re-saving a template leaves its old vectors in HNSW (no deletes);
+    # rebuild once a template has this many stale copies
+    MAX_STALE_COPIES = 3
+    # Neighbours per token when voting for a template; many templates share
+    # labels like "Name" or "Phone", so the nearest one alone is arbitrary
+    DETECT_K = 32
+    
+    # TemplateManager field types -> VALIDATION_RULES keys
+    TYPE_TO_VALIDATION = {"date": "date_bs", "amount": "currency"}
+    
+    def __init__(self, template_manager=None, embedder=None):
+        if embedder is None:
+            from sentence_transformers import SentenceTransformer
+            embedder = SentenceTransformer('all-MiniLM-L6-v2')
+        self.embedder = embedder
+        self.template_manager = template_manager
         self.field_index = None
-        self.field_mapping = []
+        self.field_mapping = {}
+        self.slots = {}          # template name -> (slot, template dict it was built from)
+        self._vectors = {}       # slot -> (ids, embeddings), kept for rebuilds
+        self._stale = {}         # template name -> stale copies still in the index
+        self._next_slot = 0
+        # Template changes arrive from TemplateManager callers' threads
+        self._lock = threading.RLock()
         self._build_field_index()
+        if template_manager:
+            template_manager.add_listener(self._on_template_change)
+    
+    def _new_index(self):
+        dimension = self.embedder.get_sentence_embedding_dimension()
+        hnsw = faiss.IndexHNSWFlat(dimension, self.HNSW_M)
+        hnsw.hnsw.efSearch = self.EF_SEARCH
+        return faiss.IndexIDMap2(hnsw)
     
     def _build_field_index(self):
-        all_patterns = []
+        self.field_index = self._new_index()
         
+        entries = []
         for page_key, page_data in INSURANCE_FORM_FIELDS.items():
             for field in page_data["fields"]:
                 for pattern in field["patterns"]:
-                    all_patterns.append(pattern)
-                    self.field_mapping.append({
+                    entries.append({
                         "field_id": field["id"],
                         "name_en": field["name_en"],
                         "name_np": field["name_np"],
                         "validation": field["validation"],
                         "pattern": pattern
                     })
+        self._add_entries(self.LEGACY_TEMPLATE, entries)
+        self.sync()
+    
+    def _template_entries(self, name, template):
+        entries = []
+        for field in template.get("fields", []):
+            field_type = field.get("type", "text")
+            labels = field.get("labels", [field["name"]]) or [field["name"]]
+            name_np = next((l for l in labels if not l.isascii()), field["name"])
+            for label in labels:
+                entries.append({
+                    "field_id": field["name"],
+                    "name_en": field["name"],
+                    "name_np": name_np,
+                    "validation": self.TYPE_TO_VALIDATION.get(
+                        field_type, field_type if field_type in VALIDATION_RULES else "text"),
+                    "pattern": label,
+                    "template": name,
+                    "version": template.get("version", 1)
+                })
+        return entries
+    
+    def _add_entries(self, name, entries, template=None):
+        """Index one template's labels under a fresh slot"""
+        old = self.slots.pop(name, None)
+        if old:
+            self._drop_slot(name, old[0])
+        
+        slot = self._next_slot
+        self._next_slot += 1
+        if len(entries) >= 1 << self.SLOT_BITS:
+            raise ValueError(f"Template {name} has too many labels")
+        
+        ids = np.array([(slot << self.SLOT_BITS) | n for n in range(len(entries))], dtype='int64')
+        if len(entries):
+            embeddings = self.embedder.encode([e["pattern"] for e in entries]).astype('float32')
+            self.field_index.add_with_ids(embeddings, ids)
+            self._vectors[slot] = (ids, embeddings)
+        for label_id, entry in zip(ids, entries):
+            self.field_mapping[int(label_id)] = entry
+        self.slots[name] = (slot, template)
+    
+    def _drop_slot(self, name, slot):
+        """Forget a slot; HNSW can't delete, so its vectors linger until rebuild"""
+        ids, _ = self._vectors.pop(slot, ((), None))
+        for label_id in ids:
+            self.field_mapping.pop(int(label_id), None)
+        self._stale[name] = self._stale.get(name, 0) + 1
+    
+    def _maybe_rebuild(self):
+        stale = self.field_index.ntotal - len(self.field_mapping)
+        if max(self._stale.values(), default=0) > self.MAX_STALE_COPIES or stale > len(self.field_mapping) // 4:
+            self.field_index = self._new_index()
+            for ids, embeddings in self._vectors.values():
+                self.field_index.add_with_ids(embeddings, ids)
+            self._stale = {}
+    
+    def add_template(self, name, template):
+        """Index (or re-index) one TemplateManager template"""
+        self._add_entries(name, self._template_entries(name, template), template)
+        self._maybe_rebuild()
+    
+    def sync(self):
+        """Index templates added or re-saved in the TemplateManager since last sync
         
-        embeddings = self.embedder.encode(all_patterns)
-        dimension = embeddings.shape[1]
-        self.field_index = faiss.IndexFlatL2(dimension)
-        self.field_index.add(embeddings.astype('float32'))
-    
-    def find_matching_field(self, text, threshold=1.0):
-        embedding = self.embedder.encode([text])
-        distances, indices = self.field_index.search(embedding.astype('float32'), k=1)
+        Only needed after editing template_manager.templates by hand; saves
+        and refreshes reach the index through _on_template_change.
+        """
+        if not self.template_manager:
+            return
+        with self._lock:
+            templates = self.template_manager.templates
+            for name, template in list(templates.items()):
+                indexed = self.slots.get(name)
+                if not indexed or indexed[1] is not template:
+                    self.add_template(name, template)
+            for name in [n for n in self.slots if n != self.LEGACY_TEMPLATE and n not in templates]:
+                self._drop_slot(name, self.slots.pop(name)[0])
+            self._maybe_rebuild()
+    
+    def _on_template_change(self, name, template):
+        """TemplateManager listener: index a saved/loaded template, drop a removed one"""
+        with self._lock:
+            if template is not None:
+                self.add_template(name, template)
+            elif name in self.slots:
+                self._drop_slot(name, self.slots.pop(name)[0])
+                self._maybe_rebuild()
+    
+    def search(self, texts, k=1, template=None):
+        """Nearest labels for each text as [(distance, mapping), ...] lists.
+        
+        template scopes the search to that template's labels with an exact
+        search over its cached vectors (a few dozen at most; HNSW with an
+        id filter misses when other templates share the labels). None
+        searches every template through HNSW.
+        """
+        if not texts or self.field_index.ntotal == 0:
+            return [[] for _ in texts]
         
-        if distances[0][0] < threshold:
-            return self.field_mapping[indices[0][0]]
+        embeddings = self.embedder.encode(list(texts)).astype('float32')
+        with self._lock:
+            return self._search(embeddings, k, template)
+    
+    def _search(self, embeddings, k, template):
+        if template is not None:
+            if template not in self.slots or self.slots[template][0] not in self._vectors:
+                return [[] for _ in embeddings]
+            ids, vectors = self._vectors[self.slots[template][0]]
+            # Squared L2, same metric as the HNSW index
+            distances = ((embeddings ** 2).sum(axis=1)[:, None] + (vectors ** 2).sum(axis=1)[None, :]
+                         - 2 * embeddings @ vectors.T)
+            order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+            distances = np.take_along_axis(distances, order, axis=1)
+            indices = ids[order]
+        else:
+            # Over-fetch so stale copies of re-saved labels can be skipped
+            fetch = k * (1 + max(self._stale.values(), default=0))
+            distances, indices = self.field_index.search(embeddings, fetch)
+        
+        results = []
+        for row_d, row_i in zip(distances, indices):
+            hits = [(float(d), self.field_mapping[int(i)])
+                    for d, i in zip(row_d, row_i) if int(i) in self.field_mapping]
+            results.append(hits[:k])
+        return results
+    
+    def find_matching_field(self, text, threshold=1.0, template=None):
+        hits = self.search([text], k=1, template=template)[0]
+        if hits and hits[0][0] < threshold:
+            return hits[0][1]
         return None
     
+    def detect_template(self, texts, threshold=1.0, min_fields=3):
+        """Template whose fields most of the texts match, or None
+        
+        Every label within threshold of a text votes for its own template,
+        counted once per field.
+        """
+        matched = {}
+        for hits in self.search(texts, k=self.DETECT_K):
+            for distance, entry in hits:
+                name = entry.get("template")
+                if distance < threshold and name:
+                    matched.setdefault(name, set()).add(entry["field_id"])
+        
+        if not matched:
+            return None
+        best = max(matched, key=lambda n: len(matched[n]))
+        return best if len(matched[best]) >= min_fields else None
+    
     def extract_value(self, text, field_info):
         validation_type = field_info["validation"]
         pattern = VALIDATION_RULES.get(validation_type, r'.+')
@@ -50,18 +222,21 @@ class SmartExtractor:
             return match.group(0)
         return text.strip()
     
-    def process_ocr_results(self, ocr_results):
+    def process_ocr_results(self, ocr_results, template=LEGACY_TEMPLATE, threshold=1.0):
         extracted_fields = {}
         unmatched = []
         
-        for item in ocr_results:
+        texts = [item["text"] for item in ocr_results]
+        matches = self.search(texts, k=1, template=template)
+        
+        for item, hits in zip(ocr_results, matches):
             text = item["text"]
-            field_info = self.find_matching_field(text)
-            
+            field_info = hits[0][1] if hits and hits[0][0] < threshold else None
+        
             if field_info:
                 field_id = field_info["field_id"]
                 value = self.extract_value(text, field_info)
-                
+        
                 extracted_fields[field_id] = {
                     "field_name_en": field_info["name_en"],
                     "field_name_np": field_info["name_np"],
@@ -75,4 +250,4 @@ class SmartExtractor:
         return {
             "matched_fields": extracted_fields,
             "unmatched_text": unmatched
-        }
\ No newline at end of file
+        }
@@ -0,0 +1,177 @@
+# synthetic_forms.py - Fake Forms for Benchmarks
+# ===============================================
+
+import json
+import random
+import string
+
+DEFAULT_TEMPLATE = "templates/insurance_form.json"
+
+NEPALI_WORDS = ["राम", "शर्मा", "काठमाडौं", "ललितपुर", "भक्तपुर", "पोखरा", "शिक्षक", "व्यापार", "नेपाली", "श्रेष्ठ"]
+ENGLISH_WORDS = ["RAM", "SHARMA", "KATHMANDU", "LALITPUR", "TEACHER", "BUSINESS", "NEPALI", "SHRESTHA", "HARI", "SITA"]
+NOISE_WORDS = ["F.N.:001", "Signature", "हस्ताक्षर", "Page", "Office Use Only", "कार्यालय प्रयोजन", "Stamp", "---", "|", "."]
+
+
+def load_template(path=DEFAULT_TEMPLATE):
+    """Load a template JSON from disk"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _bbox(x, y, w, h):
+    """easyocr style 4-point box"""
+    return [[x, y], [x + w, y], [x + w, y + h], [x, y + h]]
+
+
+def _text_width(text):
+    return 12 * max(len(text), 1)
+
+
+def _random_digits(rng, n):
+    return "".join(rng.choice(string.digits) for _ in range(n))
+
+
+def fake_value(rng, field_type):
+    """Plausible raw value for a field type"""
+    if field_type in ("phone", "mobile"):
+        if rng.random() < 0.7:
+            return "98" + _random_digits(rng, 8)
+        return "01-" + _random_digits(rng, 7)
+    if field_type == "email":
+        user = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+        return f"{user}@{rng.choice(['gmail.com', 'yahoo.com', 'ntc.net.np'])}"
+    if field_type in ("date", "date_bs"):
+        return f"20{rng.randint(20, 80)}/{rng.randint(1, 12):02d}/{rng.randint(1, 30):02d}"
+    if field_type in ("currency", "amount"):
+        amount = rng.randint(1, 5000) * 1000
+        return rng.choice(["Rs. ", "रु. ", "NPR "]) + f"{amount:,}"
+    if field_type == "pan":
+        return _random_digits(rng, 9)
+    words = NEPALI_WORDS if rng.random() < 0.5 else ENGLISH_WORDS
+    return " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+
+
+def corrupt(rng, text, rate):
+    """Simulate OCR character noise"""
+    if rate <= 0:
+        return text
+    chars = list(text)
+    for i, ch in enumerate(chars):
+        if ch.isspace() or rng.random() >= rate:
+            continue
+        roll = rng.random()
+        if roll < 0.4:
+            chars[i] = {'0': 'O', 'O': '0', '1': 'l', 'I': '|'}.get(ch, ch)
+        elif roll < 0.7:
+            chars[i] = ''
+        else:
+            chars[i] = ch + ch
+    return "".join(chars)
+
+
+def generate_form(template, seed=0, copies=1, noise_tokens=10, noise_rate=0.02, ascii_only=False):
+    """Generate OCR tokens in ocr_image() format for a filled template.
+
+    copies stacks the form vertically (multi-page batch), noise_tokens adds
+    distractor text per copy and noise_rate corrupts characters.
+    Returns (ocr_results, truth) where truth maps field name -> raw value.
+    """
+    rng = random.Random(seed)
+    results = []
+    truth = {}
+    y = 40
+
+    for copy in range(copies):
+        fields = list(template["fields"])
+        for field in fields:
+            labels = field.get("labels", [field["name"]])
+            if ascii_only:
+                labels = [l for l in labels if l.isascii()] or [field["name"]]
+            label = rng.choice(labels)
+            value = fake_value(rng, field.get("type", "text"))
+            if ascii_only and not value.isascii():
+                value = fake_value(rng, "pan") if field.get("type") == "pan" else rng.choice(ENGLISH_WORDS)
+            if copy == 0:
+                truth[field["name"]] = value
+
+            x = 40 + rng.randint(-6, 6)
+            h = 22 + rng.randint(-3, 3)
+            label_w = _text_width(label)
+            results.append({
+                "text": corrupt(rng, label, noise_rate),
+                "confidence": round(rng.uniform(0.55, 0.99), 3),
+                "bbox": _bbox(x, y, label_w, h),
+            })
+
+            # Most values sit on the same line, some on the next one
+            if rng.random() < 0.8:
+                vx, vy = x + label_w + rng.randint(10, 60), y + rng.randint(-4, 4)
+            else:
+                vx, vy = x + rng.randint(0, 30), y + h + rng.randint(6, 18)
+                y += h + 10
+            results.append({
+                "text": corrupt(rng, value, noise_rate),
+                "confidence": round(rng.uniform(0.3, 0.99), 3),
+                "bbox": _bbox(vx, vy, _text_width(value), h),
+            })
+            y += h + rng.randint(14, 30)
+
+        for _ in range(noise_tokens):
+            word = rng.choice(NOISE_WORDS + ([] if ascii_only else NEPALI_WORDS))
+            if ascii_only and not word.isascii():
+                word = rng.choice(ENGLISH_WORDS)
+            results.append({
+                "text": word,
+                "confidence": round(rng.uniform(0.1, 0.9), 3),
+                "bbox": _bbox(rng.randint(20, 900), rng.randint(max(y - 800, 0), y), _text_width(word), 20),
+            })
+        y += 200
+
+    # easyocr returns tokens roughly in reading order
+    results.sort(key=lambda r: (r["bbox"][0][1] // 20, r["bbox"][0][0]))
+    return results, truth
+
+
+def random_template(rng, name, n_fields=13):
+    """Synthetic template with unique-ish labels"""
+    types = ["text", "phone", "email", "date", "currency", "pan"]
+    fields = []
+    for i in range(n_fields):
+        word = "".join(rng.choice(string.ascii_uppercase) for _ in range(rng.randint(5, 10)))
+        fields.append({
+            "name": f"{word.title()} {i}",
+            "labels": [word, f"{word} {rng.choice(ENGLISH_WORDS)}", rng.choice(NEPALI_WORDS) + word[:3]],
+            "type": rng.choice(types),
+        })
+    return {"name": name, "fields": fields}
+
+
+def render_pdf(ocr_results, page_height=1600, page_width=1000, fontfile=None):
+    """Render tokens onto PDF pages with PyMuPDF, returns PDF bytes.
+
+    Devanagari needs a fontfile that covers it; without one use
+    generate_form(..., ascii_only=True) so the default font can draw it.
+    """
+    import fitz
+
+    doc = fitz.open()
+    pages = {}
+    for item in ocr_results:
+        (x, y) = item["bbox"][0]
+        page_no = int(y // page_height)
+        if page_no not in pages:
+            while len(doc) <= page_no:
+                doc.new_page(width=page_width, height=page_height)
+            pages[page_no] = doc[page_no]
+        page = pages[page_no]
+        height = item["bbox"][2][1] - y
+        kwargs = {"fontsize": max(height * 0.7, 6)}
+        if fontfile:
+            kwargs.update(fontname="F0", fontfile=fontfile)
+        page.insert_text((x, y - page_no * page_height + height * 0.8), item["text"], **kwargs)
+
+    if len(doc) == 0:
+        doc.new_page(width=page_width, height=page_height)
+    data = doc.tobytes()
+    doc.close()
+    return data
@@ -6,36 +6,111 @@ import os
 from rapidfuzz import fuzz, process
 
 TEMPLATE_DIR = "templates"
+VERSION_DIR = f"{TEMPLATE_DIR}/versions"
 
 class TemplateManager:
     def __init__(self):
         os.makedirs(TEMPLATE_DIR, exist_ok=True)
         self.templates = {}
+        self._mtimes = {}
+        self._listeners = []
         self.load_all_templates()
     
+    def add_listener(self, callback):
+        """Call callback(name, template) whenever a template is loaded,
+        saved or removed (template is None for removals)"""
+        self._listeners.append(callback)
+    
+    def _notify(self, name, template):
+        for callback in self._listeners:
+            callback(name, template)
+    
     def load_all_templates(self):
         """Load all saved templates"""
-        self.templates = {}
+        self._mtimes = {}
+        self.refresh()
+    
+    def refresh(self):
+        """Reload only template files added, changed or removed since last load"""
+        seen = set()
         for file in os.listdir(TEMPLATE_DIR):
-            if file.endswith('.json'):
-                name = file.replace('.json', '')
-                with open(f"{TEMPLATE_DIR}/{file}", 'r', encoding='utf-8') as f:
-                    self.templates[name] = json.load(f)
+            if not file.endswith('.json'):
+                continue
+            name = file.replace('.json', '')
+            path = f"{TEMPLATE_DIR}/{file}"
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            seen.add(name)
+            if self._mtimes.get(name) == mtime:
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                self.templates[name] = json.load(f)
+            self._mtimes[name] = mtime
+            self._notify(name, self.templates[name])
+        
+        for name in list(self.templates):
+            if name not in seen:
+                self.templates.pop(name, None)
+                self._mtimes.pop(name, None)
+                self._notify(name, None)
     
     def save_template(self, name, fields):
-        """Save a new template"""
+        """Save a new template, or the next version of an existing one"""
+        current = self.templates.get(name)
+        if current and not os.path.exists(self._version_path(name, current.get("version", 1))):
+            # Keep templates saved before versioning replayable
+            self._write(self._version_path(name, current.get("version", 1)), current)
+        
         template = {
             "name": name,
+            "version": current.get("version", 1) + 1 if current else 1,
             "fields": fields
         }
-        with open(f"{TEMPLATE_DIR}/{name}.json", 'w', encoding='utf-8') as f:
-            json.dump(template, f, indent=2, ensure_ascii=False)
+        self._write(self._version_path(name, template["version"]), template)
+        self._write(f"{TEMPLATE_DIR}/{name}.json", template)
         self.templates[name] = template
+        self._mtimes[name] = os.stat(f"{TEMPLATE_DIR}/{name}.json").st_mtime_ns
+        self._notify(name, template)
     
     def get_template(self, name):
         """Get template by name"""
         return self.templates.get(name)
     
+    def get_template_version(self, name, version=None):
+        """Get a specific version of a template (latest when version is None)"""
+        current = self.templates.get(name)
+        if version is None or (current and current.get("version", 1) == version):
+            return current
+        path = self._version_path(name, version)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def list_versions(self, name):
+        """Saved version numbers of a template"""
+        versions = set()
+        if name in self.templates:
+            versions.add(self.templates[name].get("version", 1))
+        folder = f"{VERSION_DIR}/{name}"
+        if os.path.isdir(folder):
+            for file in os.listdir(folder):
+                if file.endswith('.json'):
+                    versions.add(int(file.replace('.json', '')))
+        return sorted(versions)
+    
+    @staticmethod
+    def _version_path(name, version):
+        return f"{VERSION_DIR}/{name}/{version}.json"
+    
+    @staticmethod
+    def _write(path, template):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(template, f, indent=2, ensure_ascii=False)
+    
     def list_templates(self):
         """List all template names"""
         return list(self.templates.keys())
@@ -0,0 +1,99 @@
+import threading
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+pytest.importorskip("numpy")
+
+from ocr_batcher import MicroBatcher
+
+
+class FakeReader:
+    """Reports each page's grey level as its text so routing can be checked"""
+
+    def __init__(self):
+        self.single_calls = 0
+        self.batched_calls = []
+
+    @staticmethod
+    def _read(array):
+        return [([[0, 0], [10, 0], [10, 10], [0, 10]], f"page-{array[0, 0, 0]}", 0.9)]
+
+    def readtext(self, array, batch_size=1):
+        self.single_calls += 1
+        return self._read(array)
+
+    def readtext_batched(self, arrays, batch_size=1):
+        assert len({a.shape for a in arrays}) == 1
+        self.batched_calls.append(len(arrays))
+        return [self._read(a) for a in arrays]
+
+
+def test_pages_from_concurrent_jobs_share_one_batch():
+    reader = FakeReader()
+    batcher = MicroBatcher(lambda: reader, max_wait=0.5)
+    futures = {}
+
+    def job(level, size):
+        futures[level] = batcher.submit(Image.new("RGB", size, (level, level, level)))
+
+    # Different sizes within one bucket, padded to a common shape
+    threads = [threading.Thread(target=job, args=(10, (100, 100))),
+               threading.Thread(target=job, args=(20, (120, 90)))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert futures[10].result(timeout=5)[0]["text"] == "page-10"
+    assert futures[20].result(timeout=5)[0]["text"] == "page-20"
+    assert reader.batched_calls == [2]
+    assert reader.single_calls == 0
+
+
+def test_target_size_is_relative_to_single_page_time():
+    batcher = MicroBatcher(lambda: FakeReader(), latency_factor=4.0)
+    # Slow CPU: 20s alone, 8s per page when batched
+    batcher._single, batcher._per_page = 20.0, 8.0
+    assert batcher.target_size() == 10
+    # No saving from batching still allows latency_factor pages
+    batcher._single = None
+    assert batcher.target_size() == 4
+
+
+
+class ShortReader(FakeReader):
+    """Drops the last page of every batch"""
+
+    def readtext_batched(self, arrays, batch_size=1):
+        return super().readtext_batched(arrays, batch_size)[:-1]
+
+
+class MalformedReader(FakeReader):
+    """Output format_results can't parse"""
+
+    @staticmethod
+    def _read(array):
+        return [("no bbox",)]
+
+
+def _submit_two(batcher):
+    return [batcher.submit(Image.new("RGB", (100, 100), (n, n, n))) for n in (1, 2)]
+
+
+def test_short_batch_result_fails_every_future():
+    batcher = MicroBatcher(lambda: ShortReader(), max_wait=0.2)
+    for f in _submit_two(batcher):
+        with pytest.raises(RuntimeError, match="1 results for 2 pages"):
+            f.result(timeout=5)
+
+
+def test_format_error_fails_futures_and_batcher_keeps_running():
+    reader = MalformedReader()
+    batcher = MicroBatcher(lambda: reader, max_wait=0.2)
+    for f in _submit_two(batcher):
+        with pytest.raises(ValueError):
+            f.result(timeout=5)
+
+    reader._read = FakeReader._read
+    assert batcher.submit(Image.new("RGB", (100, 100), (7, 7, 7))).result(timeout=5)[0]["text"] == "page-7"
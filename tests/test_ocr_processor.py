@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip("rapidfuzz")
+pytest.importorskip("numpy")
+
+from ocr_processor import OCRProcessor
+
+
+def _token(text, x, y, confidence=0.9):
+    return {"text": text, "confidence": confidence,
+            "bbox": [[x, y], [x + 80, y], [x + 80, y + 20], [x, y + 20]]}
+
+
+def test_same_line_value_beats_next_line():
+    ocr = [_token("Name", 10, 10), _token("Ram Sharma", 120, 10), _token("Sita Devi", 10, 45)]
+    extracted = OCRProcessor.process_results(ocr, [{"name": "Name", "labels": ["Name"]}])
+    assert extracted["Name"]["value"] == "Ram Sharma"
+    assert [c["value"] for c in extracted["Name"]["candidates"]] == ["Ram Sharma", "Sita Devi"]
+
+
+def test_fields_do_not_share_a_token_and_none_are_dropped():
+    ocr = [_token("Name", 10, 10)] + [_token(v, 120 + 100 * n, 10)
+                                      for n, v in enumerate(["AAA", "BBB", "CCC", "DDD"])]
+    fields = [{"name": f"f{n}", "labels": ["Name"]} for n in range(4)]
+    extracted = OCRProcessor.process_results(ocr, fields, top_k=3)
+    assert sorted(d["value"] for d in extracted.values()) == ["AAA", "BBB", "CCC", "DDD"]
+    assert all(len(d["candidates"]) == 3 for d in extracted.values())
+
+
+def test_typed_extractor_failure_skips_candidate():
+    ocr = [_token("Phone", 10, 10), _token("call me", 120, 10), _token("9812345678", 220, 10)]
+    extracted = OCRProcessor.process_results(ocr, [{"name": "Phone", "labels": ["Phone"], "type": "phone"}])
+    assert extracted["Phone"]["value"] == "9812345678"
+    assert [c["raw"] for c in extracted["Phone"]["candidates"]] == ["9812345678"]
+
+
+def test_confidence_is_value_confidence():
+    ocr = [_token("Email", 10, 10, confidence=0.99), _token("ram@gmail.com", 120, 10, confidence=0.42)]
+    data = OCRProcessor.process_results(ocr, [{"name": "Email", "labels": ["Email"], "type": "email"}])["Email"]
+    assert data["confidence"] == pytest.approx(0.42)
+    assert data["label_confidence"] == pytest.approx(0.99)
+    assert 0 < data["score"] <= 1
+
+
+def test_empty_inputs():
+    fields = [{"name": "Name", "labels": ["Name"]}]
+    assert OCRProcessor.process_results([], fields) == {}
+    assert OCRProcessor.process_results([_token("Name", 10, 10), _token("Ram", 120, 10)], []) == {}
+    assert OCRProcessor.field_candidates([], fields) == [[]]
@@ -0,0 +1,91 @@
+import pytest
+
+pytest.importorskip("rapidfuzz")
+pytest.importorskip("numpy")
+
+from ocr_store import OCRStore
+from ocr_processor import OCRProcessor
+from reextract import diff_fields, reextract
+from template_manager import TemplateManager
+
+
+def _token(text, x, y):
+    return {"text": text, "confidence": 0.9, "bbox": [[x, y], [x + 80, y], [x + 80, y + 20], [x, y + 20]]}
+
+
+OCR = [_token("Phone", 10, 10), _token("9812345678", 120, 10),
+       _token("Email", 10, 60), _token("ram@gmail.com", 120, 60)]
+
+V1 = [{"name": "Phone", "labels": ["Phone"], "type": "phone"}]
+V2 = V1 + [{"name": "Email", "labels": ["Email"], "type": "email"}]
+
+
+@pytest.fixture
+def tm(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return TemplateManager()
+
+
+def test_save_template_bumps_version_and_keeps_history(tm):
+    tm.save_template("form", V1)
+    tm.save_template("form", V2)
+    assert tm.get_template("form")["version"] == 2
+    assert tm.list_versions("form") == [1, 2]
+    assert tm.get_template_version("form", 1)["fields"] == V1
+    assert tm.get_template_version("form")["fields"] == V2
+    assert tm.get_template_version("form", 3) is None
+
+    # History survives a reload from disk
+    assert TemplateManager().list_versions("form") == [1, 2]
+
+
+def test_diff_fields():
+    old = {"a": {"value": "1"}, "b": {"value": "2"}}
+    new = {"b": {"value": "3"}, "c": {"value": "4"}}
+    assert diff_fields(old, new) == {
+        "added": {"c": "4"},
+        "removed": {"a": "1"},
+        "changed": {"b": {"old": "2", "new": "3"}},
+    }
+
+
+def _store_doc(tm, tmp_path, doc_id, template):
+    store = OCRStore(str(tmp_path / "store"))
+    extracted = OCRProcessor.process_results(OCR, tm.get_template_version("form", 1)["fields"])
+    store.save(doc_id, f"{doc_id}.pdf", OCR, 0.0, template, 1, extracted)
+    return store
+
+
+def test_reextract_reports_changes_and_writes(tm, tmp_path):
+    tm.save_template("form", V1)
+    store = _store_doc(tm, tmp_path, "doc1", "form")
+    tm.save_template("form", V2)
+
+    results = reextract(store, tm, workers=1)
+    assert [r["changes"]["added"] for r in results] == [{"Email": "ram@gmail.com"}]
+    assert store.load("doc1")["template_version"] == 1
+
+    reextract(store, tm, write=True, workers=1)
+    record = store.load("doc1")
+    assert record["template_version"] == 2
+    assert set(record["extracted"]) == {"Phone", "Email"}
+
+    # Replaying v1 again removes the field
+    results = reextract(store, tm, template="form", version=1, workers=1)
+    assert results[0]["changes"]["removed"] == {"Email": "ram@gmail.com"}
+
+
+def test_reextract_template_only_touches_its_documents(tm, tmp_path):
+    tm.save_template("form", V1)
+    store = _store_doc(tm, tmp_path, "mine", "form")
+    _store_doc(tm, tmp_path, "other", "other_form")
+
+    assert [r["doc_id"] for r in reextract(store, tm, template="form", workers=1)] == ["mine"]
+    forced = reextract(store, tm, template="form", workers=1, all_documents=True)
+    assert sorted(r["doc_id"] for r in forced) == ["mine", "other"]
+
+
+def test_reextract_unknown_version_lists_saved_versions(tm, tmp_path):
+    tm.save_template("form", V1)
+    with pytest.raises(ValueError, match=r"\[1\]"):
+        reextract(OCRStore(str(tmp_path / "store")), tm, template="form", version=9, workers=1)
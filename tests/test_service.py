@@ -0,0 +1,62 @@
+import io
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("rapidfuzz")
+
+from service import JobQueue, Job, QueueFull, UploadTooLarge
+
+
+def test_upload_over_cap_is_refused_even_when_idle():
+    queue = JobQueue(max_jobs=4, max_bytes=100, max_upload=50)
+    with pytest.raises(UploadTooLarge):
+        queue.admit(51)
+    queue.admit(50)
+
+
+def test_running_job_bytes_count_until_released():
+    queue = JobQueue(max_jobs=4, max_bytes=100, max_upload=100)
+    job = Job(b"x" * 80)
+    queue.put(job)
+    assert queue.get() is job
+    # Popped but still running: its bytes still count
+    with pytest.raises(QueueFull):
+        queue.admit(30)
+    queue.release(job)
+    queue.admit(30)
+    assert queue.stats()["running"] == 0
+
+
+def test_stuck_ocr_fails_job_after_page_timeout(tmp_path, monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    pytest.importorskip("numpy")
+    import pipeline
+    from ocr_store import OCRStore
+    from service import ExtractionService
+
+    release = threading.Event()
+
+    class StuckReader:
+        def readtext(self, array, batch_size=1):
+            release.wait()
+            return []
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(pipeline, "load_reader", StuckReader)
+    monkeypatch.setattr(pipeline, "load_detector", lambda tm: None)
+    service = ExtractionService(workers=1, store=OCRStore(str(tmp_path / "store")), page_timeout=0.2).start()
+
+    png = io.BytesIO()
+    Image.new("RGB", (50, 50)).save(png, format="PNG")
+    job = Job(png.getvalue(), "page.png")
+    service.submit(job)
+    deadline = time.time() + 5
+    while job.finished is None and time.time() < deadline:
+        time.sleep(0.05)
+    release.set()
+
+    assert job.status == "failed"
+    assert "timed out" in job.error
+    assert service.queue.stats()["running"] == 0
@@ -0,0 +1,110 @@
+import hashlib
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from smart_extractor import SmartExtractor
+from template_manager import TemplateManager
+from synthetic_forms import load_template
+
+REPO_TEMPLATE = load_template(
+    __file__.rsplit("tests", 1)[0] + "templates/insurance_form.json")
+
+
+class FakeEmbedder:
+    """Deterministic character-trigram embedding, unit length"""
+
+    def get_sentence_embedding_dimension(self):
+        return 64
+
+    def encode(self, texts):
+        out = np.zeros((len(texts), 64), dtype='float32')
+        for n, text in enumerate(texts):
+            text = text.lower()
+            for i in range(max(1, len(text) - 2)):
+                out[n, int(hashlib.md5(text[i:i + 3].encode()).hexdigest(), 16) % 64] += 1
+            out[n] /= np.linalg.norm(out[n]) or 1
+        return out
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tm = TemplateManager()
+    for i in range(300):
+        # Same labels in every copy, field names tell the copies apart
+        tm.templates[f"ins{i}"] = {
+            "name": f"ins{i}",
+            "fields": [dict(f, name=f"{f['name']} #{i}") for f in REPO_TEMPLATE["fields"]],
+        }
+    return tm
+
+
+def test_scoped_search_resolves_within_shared_labels(manager):
+    se = SmartExtractor(manager, embedder=FakeEmbedder())
+    for i in range(0, 300, 7):
+        match = se.find_matching_field("Phone", template=f"ins{i}")
+        assert match is not None
+        assert match["template"] == f"ins{i}"
+        assert match["field_id"] == f"Phone #{i}"
+
+
+def test_field_config_scope_unaffected_by_templates(manager):
+    se = SmartExtractor(manager, embedder=FakeEmbedder())
+    result = se.process_ocr_results([{"text": "Sum Assured", "confidence": 0.9},
+                                     {"text": "Mobile", "confidence": 0.9}])
+    assert set(result["matched_fields"]) == {"2.ग", "1.ग.5"}
+
+
+def test_scoped_search_after_resave(manager):
+    se = SmartExtractor(manager, embedder=FakeEmbedder())
+    manager.save_template("ins5", [{"name": "Renamed Phone", "labels": ["Phone"], "type": "phone"}])
+    match = se.find_matching_field("Phone", template="ins5")
+    assert match["field_id"] == "Renamed Phone"
+
+
+def test_detect_template_counts_all_neighbours(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tm = TemplateManager()
+    shared = [{"name": n, "labels": [n], "type": "text"} for n in ("Name", "Phone", "Date")]
+    for i in range(20):
+        tm.templates[f"generic{i}"] = {"name": f"generic{i}", "fields": shared}
+    tm.templates["insurance"] = {
+        "name": "insurance",
+        "fields": shared + [{"name": n, "labels": [n], "type": "text"}
+                            for n in ("Sum Assured", "Nominee", "Policy Term")],
+    }
+    se = SmartExtractor(tm, embedder=FakeEmbedder())
+    texts = ["Name", "Phone", "Date", "Sum Assured", "Nominee", "Policy Term"]
+    assert se.detect_template(texts) == "insurance"
+
+
+def test_index_follows_template_manager_without_sync(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    tm = TemplateManager()
+    se = SmartExtractor(tm, embedder=FakeEmbedder())
+    se.sync = None  # queries must not depend on a per-search sync
+
+    tm.save_template("ins", REPO_TEMPLATE["fields"])
+    assert se.find_matching_field("Phone", template="ins")["template"] == "ins"
+
+    (tmp_path / "templates" / "ins.json").unlink()
+    tm.refresh()
+    assert se.find_matching_field("Phone", template="ins") is None
+    assert all(h[1].get("template") != "ins" for h in se.search(["Phone"], k=8)[0])
+
+
+def test_extract_fields_uses_detector_for_auto(tmp_path, monkeypatch):
+    import pipeline
+    monkeypatch.chdir(tmp_path)
+    tm = TemplateManager()
+    tm.save_template("insurance", REPO_TEMPLATE["fields"])
+    se = SmartExtractor(tm, embedder=FakeEmbedder())
+    monkeypatch.setattr(tm, "auto_detect_template", lambda texts: pytest.fail("fuzzy path used"))
+
+    labels = [f["labels"][0] for f in REPO_TEMPLATE["fields"]]
+    ocr = [{"text": t, "confidence": 0.9, "bbox": [[10, 40 * n], [90, 40 * n], [90, 40 * n + 20], [10, 40 * n + 20]]}
+           for n, t in enumerate(labels)]
+    assert pipeline.extract_fields(ocr, tm, "Auto", detector=se)[0] == "insurance"